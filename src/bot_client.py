@@ -1,31 +1,63 @@
 from __future__ import annotations
 
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
 import structlog
-from telegram import Bot
+from telegram import Bot, Update
 from telegram.error import BadRequest, RetryAfter, TelegramError
+from telegram.request import HTTPXRequest
 
 LOGGER_NAME = "repost.bot_client"
 
+CONNECTION_POOL_SIZE = 32
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 20.0
+
+# How many RetryAfter throttles a batch copy sleeps through before the
+# error is surfaced to the caller's retry policy.
+COPY_BATCH_MAX_RETRIES = 3
+
+__all__ = ["BotClient", "MessageMissingError"]
+
+# Bot API error fragments that mean the source message no longer exists.
+_MISSING_MESSAGE_FRAGMENTS = (
+    "message to copy not found",
+    "message to forward not found",
+    "message_id_invalid",
+)
+
+
+class MessageMissingError(TelegramError):
+    """Raised when the message to copy no longer exists in the source."""
+
 
 class BotClient:
     def __init__(
         self,
         token: str,
-        logger: Optional[structlog.stdlib.BoundLogger] = None,
+        logger: Optional[structlog.typing.FilteringBoundLogger] = None,
         bot: Optional[Bot] = None,
     ):
-        self.logger = logger or structlog.get_logger(LOGGER_NAME)
-        self.bot = bot or Bot(token=token)
-
-    @staticmethod
-    def _chat_matches_source(chat, source_channel: str) -> bool:
-        username = (getattr(chat, "username", None) or "").lstrip("@").lower()
-        normalized_source = source_channel.lstrip("@").lower()
-        chat_id = str(getattr(chat, "id", ""))
-        return username == normalized_source or chat_id == source_channel
+        self.logger = logger or structlog.get_logger().bind(logger=LOGGER_NAME)
+        if bot is None:
+            # One shared httpx connection pool per process; a second request
+            # instance keeps get_updates long-polling off the hot pool.
+            bot = Bot(
+                token=token,
+                request=HTTPXRequest(
+                    connection_pool_size=CONNECTION_POOL_SIZE,
+                    connect_timeout=CONNECT_TIMEOUT,
+                    read_timeout=READ_TIMEOUT,
+                ),
+                get_updates_request=HTTPXRequest(
+                    connection_pool_size=1,
+                    connect_timeout=CONNECT_TIMEOUT,
+                    read_timeout=READ_TIMEOUT,
+                ),
+            )
+        self.bot = bot
 
     async def fetch_channel_posts(
         self,
@@ -41,8 +73,16 @@ class BotClient:
         )
         posts: List[Dict] = []
         latest_update_id = last_update_id
-        start_day = start_date.astimezone(timezone).date()
-        end_day = end_date.astimezone(timezone).date()
+        # Window bounds as epoch seconds, computed once per poll; start/end
+        # are midnight-localized so [start, end + 1 day) covers the same
+        # days the per-update date comparison did.
+        start_ts = start_date.timestamp()
+        end_ts = (end_date + timedelta(days=1)).timestamp()
+        # Normalize the source reference once; after the first match the
+        # predicate collapses to an integer comparison on the chat id.
+        wanted_name = source_channel.lstrip("@").lower()
+        wanted_id = int(source_channel) if source_channel.lstrip("-").isdigit() else None
+        resolved_id: Optional[int] = None
 
         for update in updates:
             if latest_update_id is None or update.update_id > latest_update_id:
@@ -53,31 +93,86 @@ class BotClient:
                 continue
 
             chat = message.chat
-            if not self._chat_matches_source(chat, source_channel):
-                continue
-
-            msg_date = message.date
-            if msg_date.tzinfo:
-                msg_date = msg_date.astimezone(timezone)
+            if resolved_id is not None:
+                if chat.id != resolved_id:
+                    continue
             else:
-                msg_date = timezone.localize(msg_date)
+                username = (getattr(chat, "username", None) or "").lstrip("@").lower()
+                if username != wanted_name and chat.id != wanted_id:
+                    continue
+                resolved_id = chat.id
 
-            msg_day = msg_date.date()
-            if msg_day < start_day or msg_day > end_day:
+            # python-telegram-bot always yields aware (UTC) datetimes, so no
+            # naive fallback is needed here.
+            ts = message.date.timestamp()
+            if ts < start_ts or ts >= end_ts:
                 continue
 
+            # Only the rows that survive the filter pay for the conversion.
+            local_date = message.date.astimezone(timezone)
             preview = (message.text or message.caption or "")[:500]
             posts.append(
                 {
                     "message_id": message.message_id,
                     "channel_id": chat.id,
-                    "post_date": msg_date.replace(tzinfo=None),
+                    "post_date": local_date.replace(tzinfo=None),
                     "content_preview": preview,
                 }
             )
 
         return posts, latest_update_id
 
+    async def set_webhook(self, url: str) -> None:
+        """Subscribe to channel_post updates pushed by Telegram."""
+        await self.bot.set_webhook(url=url, allowed_updates=["channel_post"])
+        self.logger.info("Webhook registered")
+
+    def extract_channel_post(
+        self,
+        payload: Dict,
+        source_channel: str,
+        start_date: datetime,
+        end_date: datetime,
+        timezone,
+    ) -> Optional[Dict]:
+        """Turn one pushed update payload into a post row, or None.
+
+        Applies the same source and date-window filters as
+        ``fetch_channel_posts``.
+        """
+        # The payload arrives straight off the public webhook endpoint, so
+        # a malformed body must read as "not a post", not bubble up as a
+        # 500 from the route.
+        try:
+            update = Update.de_json(payload, self.bot)
+        except Exception as exc:
+            self.logger.warning(
+                "Discarding malformed update payload", error=str(exc)
+            )
+            return None
+        message = getattr(update, "channel_post", None)
+        if not message:
+            return None
+
+        chat = message.chat
+        username = (getattr(chat, "username", None) or "").lstrip("@").lower()
+        wanted_name = source_channel.lstrip("@").lower()
+        wanted_id = int(source_channel) if source_channel.lstrip("-").isdigit() else None
+        if username != wanted_name and chat.id != wanted_id:
+            return None
+
+        ts = message.date.timestamp()
+        if ts < start_date.timestamp() or ts >= (end_date + timedelta(days=1)).timestamp():
+            return None
+
+        local_date = message.date.astimezone(timezone)
+        return {
+            "message_id": message.message_id,
+            "channel_id": chat.id,
+            "post_date": local_date.replace(tzinfo=None),
+            "content_preview": (message.text or message.caption or "")[:500],
+        }
+
     async def copy_post(
         self, target_channel_id: int, source_channel: str, message_id: int
     ) -> None:
@@ -94,11 +189,58 @@ class BotClient:
                 target_channel_id=target_channel_id,
             )
         except TelegramError as exc:
+            error_text = str(exc).lower()
+            if any(fragment in error_text for fragment in _MISSING_MESSAGE_FRAGMENTS):
+                raise MessageMissingError(str(exc)) from exc
             self.logger.error(
                 "Failed to copy message", message_id=message_id, error=str(exc)
             )
             raise
 
+    async def copy_posts(
+        self, target_channel_id: int, source_channel: str, message_ids: List[int]
+    ) -> None:
+        """Copy a batch of messages (up to 100) in a single Bot API request."""
+        attempt = 0
+        while True:
+            try:
+                await self.bot.copy_messages(
+                    chat_id=target_channel_id,
+                    from_chat_id=source_channel,
+                    message_ids=message_ids,
+                    protect_content=False,
+                )
+                self.logger.info(
+                    "Posts copied",
+                    count=len(message_ids),
+                    target_channel_id=target_channel_id,
+                )
+                return
+            except RetryAfter as exc:
+                # Honor a bounded number of server-side waits, then let the
+                # caller's retry policy decide — matching how the other
+                # retry loops in this project cap their attempts.
+                attempt += 1
+                if attempt > COPY_BATCH_MAX_RETRIES:
+                    self.logger.error(
+                        "Bot API throttled batch copy; retries exhausted",
+                        count=len(message_ids),
+                        retry_after=exc.retry_after,
+                    )
+                    raise
+                self.logger.warning(
+                    "Bot API throttled batch copy",
+                    retry_after=exc.retry_after,
+                )
+                await asyncio.sleep(exc.retry_after)
+            except TelegramError as exc:
+                self.logger.error(
+                    "Failed to copy message batch",
+                    count=len(message_ids),
+                    error=str(exc),
+                )
+                raise
+
     async def status(self) -> str:
         try:
             await self.bot.get_me()
@@ -2,10 +2,10 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
-from datetime import datetime, time
+from datetime import datetime, time, tzinfo
 from typing import Optional
+from zoneinfo import ZoneInfo
 
-import pytz
 from dotenv import load_dotenv
 
 DATE_FORMAT = "%Y-%m-%d"
@@ -30,13 +30,19 @@ class Config:
     database_url: str
     port: int
     log_level: str
-    timezone: pytz.BaseTzInfo
+    timezone: tzinfo
     max_retries: int = 3
     retry_delay_seconds: int = 30
+    workers: int = 1
+    webhook_url: Optional[str] = None
+    webhook_secret: Optional[str] = None
     database_ssl: bool = True
     database_connect_timeout: float = 10.0
     database_command_timeout: float = 60.0
     database_disable_statement_cache: bool = False
+    database_pool_min_size: int = 1
+    database_pool_max_size: int = 5
+    database_pool_recycle_seconds: float = 300.0
 
 
 def _require(name: str) -> str:
@@ -62,20 +68,20 @@ def _parse_float(name: str) -> float:
         raise ConfigError(f"{name} must be a number") from exc
 
 
-def _parse_date(name: str, tz: pytz.BaseTzInfo) -> datetime:
+def _parse_date(name: str, tz: tzinfo) -> datetime:
     raw = _require(name)
     try:
         parsed_date = datetime.strptime(raw, DATE_FORMAT).date()
     except ValueError as exc:
         raise ConfigError(f"{name} must match {DATE_FORMAT}") from exc
-    return tz.localize(datetime.combine(parsed_date, time()))
+    return datetime.combine(parsed_date, time(), tzinfo=tz)
 
 
-def _timezone(name: str = "TIMEZONE") -> pytz.BaseTzInfo:
+def _timezone(name: str = "TIMEZONE") -> tzinfo:
     raw = os.getenv(name, "UTC")
     try:
-        return pytz.timezone(raw)
-    except Exception as exc:  # pragma: no cover - pytz has custom exceptions
+        return ZoneInfo(raw)
+    except Exception as exc:  # pragma: no cover - key errors vary by source
         raise ConfigError(f"Invalid timezone: {raw}") from exc
 
 
@@ -108,15 +114,18 @@ def load_config() -> Config:
         telegram_session_string=os.getenv("TELEGRAM_SESSION_STRING"),
         telegram_bot_token=_require("TELEGRAM_BOT_TOKEN"),
         target_channel_id=_parse_int("TARGET_CHANNEL_ID"),
-        source_channel=_require("SOURCE_CHANNEL").lstrip("@"),
+        source_channel=_require("SOURCE_CHANNEL").lstrip("@").lower(),
         start_datetime=start_datetime,
         end_datetime=end_datetime,
         database_url=_require("DATABASE_URL"),
         port=_parse_int("PORT"),
         log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
         timezone=tz,
+        webhook_url=os.getenv("WEBHOOK_URL"),
+        webhook_secret=os.getenv("WEBHOOK_SECRET"),
         database_ssl=_parse_bool("DATABASE_SSL", default=True),
         max_retries=_parse_int("MAX_RETRIES") if os.getenv("MAX_RETRIES") else 3,
+        workers=_parse_int("WORKERS") if os.getenv("WORKERS") else 1,
         retry_delay_seconds=_parse_int("RETRY_DELAY_SECONDS")
         if os.getenv("RETRY_DELAY_SECONDS")
         else 30,
@@ -129,5 +138,14 @@ def load_config() -> Config:
         database_disable_statement_cache=_parse_bool(
             "DATABASE_DISABLE_STATEMENT_CACHE", default=False
         ),
+        database_pool_min_size=_parse_int("DATABASE_POOL_MIN_SIZE")
+        if os.getenv("DATABASE_POOL_MIN_SIZE")
+        else 1,
+        database_pool_max_size=_parse_int("DATABASE_POOL_MAX_SIZE")
+        if os.getenv("DATABASE_POOL_MAX_SIZE")
+        else 5,
+        database_pool_recycle_seconds=_parse_float("DATABASE_POOL_RECYCLE_SECONDS")
+        if os.getenv("DATABASE_POOL_RECYCLE_SECONDS")
+        else 300.0,
     )
     return config
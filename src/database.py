@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 import asyncio
-import inspect
+import random
+import time
 from datetime import datetime
 import ssl
-from typing import Any, Dict, Optional, cast
-from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple, cast
 from urllib.parse import urlparse
 
 import asyncpg
@@ -14,6 +14,13 @@ import structlog
 
 LOGGER_NAME = "repost.database"
 
+# Built once at import: create_default_context loads the system CA bundle,
+# which is too expensive to repeat on every (re)connect attempt. For Supabase
+# poolers we disable hostname check/cert verify to avoid DNS/SSL mismatches.
+_SSL_CTX = ssl.create_default_context()
+_SSL_CTX.check_hostname = False
+_SSL_CTX.verify_mode = ssl.CERT_NONE
+
 CREATE_POSTS_TABLE = """
 CREATE TABLE IF NOT EXISTS repost_posts (
     id SERIAL PRIMARY KEY,
@@ -31,6 +38,10 @@ CREATE_POSTS_INDEX = """
 CREATE INDEX IF NOT EXISTS idx_repost_posts_not_reposted ON repost_posts(is_reposted, post_date);
 """
 
+CREATE_POSTS_PARTIAL_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_repost_unreposted ON repost_posts(id) WHERE is_reposted = FALSE;
+"""
+
 CREATE_CONFIG_TABLE = """
 CREATE TABLE IF NOT EXISTS repost_config (
     key VARCHAR(255) PRIMARY KEY,
@@ -49,12 +60,98 @@ CREATE TABLE IF NOT EXISTS repost_session (
 
 SESSION_KEY = "telethon_session"
 
+# How long COUNT(*) results may be served from memory before re-querying.
+COUNT_CACHE_TTL_SECONDS = 5.0
+
+# Per-connection prepared-statement LRU size. The app has ~15 distinct
+# statements, so every hot query stays prepared after its first run.
+STATEMENT_CACHE_SIZE = 128
+
+# Hot-path statements live at module level so every call hands asyncpg the
+# same interned string and its per-connection prepared-statement cache
+# (statement_cache_size on the pool) hits without re-parsing.
+UPSERT_POST_SQL = """
+INSERT INTO repost_posts (message_id, channel_id, post_date, content_preview)
+VALUES ($1, $2, $3, $4)
+ON CONFLICT (message_id) DO UPDATE
+SET channel_id = EXCLUDED.channel_id,
+    post_date = EXCLUDED.post_date,
+    content_preview = EXCLUDED.content_preview;
+"""
+
+RANDOM_UNREPOSTED_SQL = """
+SELECT id, message_id, channel_id, post_date
+FROM repost_posts
+WHERE is_reposted = FALSE
+  AND id >= (SELECT floor(random() * (max(id) + 1)) FROM repost_posts)
+ORDER BY id
+LIMIT 1;
+"""
+
+FIRST_UNREPOSTED_SQL = """
+SELECT id, message_id, channel_id, post_date
+FROM repost_posts
+WHERE is_reposted = FALSE
+ORDER BY id
+LIMIT 1;
+"""
+
+MARK_REPOSTED_SQL = """
+UPDATE repost_posts
+SET is_reposted = TRUE,
+    reposted_at = COALESCE($2, CURRENT_TIMESTAMP)
+WHERE message_id = $1;
+"""
+
+COUNT_UNREPOSTED_SQL = "SELECT COUNT(*) FROM repost_posts WHERE is_reposted = FALSE;"
+
+COUNT_POSTS_SQL = "SELECT COUNT(*) FROM repost_posts;"
+
+MAX_MESSAGE_ID_SQL = "SELECT COALESCE(MAX(message_id), 0) FROM repost_posts;"
+
+INITIALIZATION_SNAPSHOT_SQL = """
+SELECT
+    (SELECT value FROM repost_config WHERE key = 'initialized_at') AS initialized_at,
+    (SELECT COUNT(*) FROM repost_posts) AS post_count;
+"""
+
+LATEST_REPOST_SQL = """
+SELECT reposted_at FROM repost_posts
+WHERE reposted_at IS NOT NULL
+ORDER BY reposted_at DESC
+LIMIT 1;
+"""
+
+TRY_ADVISORY_LOCK_SQL = "SELECT pg_try_advisory_lock($1);"
+
+ADVISORY_UNLOCK_SQL = "SELECT pg_advisory_unlock($1);"
+
+SAVE_SESSION_SQL = """
+INSERT INTO repost_session (key, value, updated_at)
+VALUES ($1, $2, CURRENT_TIMESTAMP)
+ON CONFLICT (key) DO UPDATE
+SET value = EXCLUDED.value,
+    updated_at = CURRENT_TIMESTAMP;
+"""
+
+LOAD_SESSION_SQL = "SELECT value FROM repost_session WHERE key = $1;"
+
+SET_CONFIG_SQL = """
+INSERT INTO repost_config (key, value, updated_at)
+VALUES ($1, $2, CURRENT_TIMESTAMP)
+ON CONFLICT (key) DO UPDATE
+SET value = EXCLUDED.value,
+    updated_at = CURRENT_TIMESTAMP;
+"""
+
+GET_CONFIG_SQL = "SELECT value FROM repost_config WHERE key = $1;"
+
 
 class Database:
     def __init__(
         self,
         dsn: str,
-        logger: Optional[structlog.stdlib.BoundLogger] = None,
+        logger: Optional[structlog.typing.FilteringBoundLogger] = None,
         pool: Optional[Any] = None,
         max_retries: int = 3,
         retry_delay_seconds: int = 30,
@@ -62,16 +159,37 @@ class Database:
         connect_timeout: float = 10.0,
         command_timeout: float = 60.0,
         disable_statement_cache: bool = False,
+        pool_min_size: int = 1,
+        pool_max_size: int = 5,
+        pool_recycle_seconds: float = 300.0,
     ):
         self.dsn = dsn
         self.pool = pool
-        self.logger = logger or structlog.get_logger(LOGGER_NAME)
+        self.logger = logger or structlog.get_logger().bind(logger=LOGGER_NAME)
         self.max_retries = max_retries
         self.retry_delay_seconds = retry_delay_seconds
         self.use_ssl = use_ssl
         self.connect_timeout = connect_timeout
         self.command_timeout = command_timeout
         self.disable_statement_cache = disable_statement_cache
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.pool_recycle_seconds = pool_recycle_seconds
+        self._count_cache: Dict[str, Tuple[float, int]] = {}
+        self._advisory_connections: Dict[int, Any] = {}
+
+    def _cached_count(self, key: str) -> Optional[int]:
+        entry = self._count_cache.get(key)
+        if entry and time.monotonic() - entry[0] < COUNT_CACHE_TTL_SECONDS:
+            return entry[1]
+        return None
+
+    def _store_count(self, key: str, value: int) -> int:
+        self._count_cache[key] = (time.monotonic(), value)
+        return value
+
+    def _invalidate_counts(self) -> None:
+        self._count_cache.clear()
 
     def _dsn_info(self) -> Dict[str, Any]:
         parsed = urlparse(self.dsn)
@@ -90,14 +208,9 @@ class Database:
         if self.pool is None:
             attempt = 0
             dsn_info = self._dsn_info()
+            ssl_ctx = _SSL_CTX if self.use_ssl else None
             while attempt < self.max_retries:
                 attempt += 1
-                ssl_ctx = None
-                if self.use_ssl:
-                    ssl_ctx = ssl.create_default_context()
-                    # For Supabase poolers we disable hostname check/cert verify to avoid DNS/SSL mismatches.
-                    ssl_ctx.check_hostname = False
-                    ssl_ctx.verify_mode = ssl.CERT_NONE
                 try:
                     self.logger.info(
                         "Connecting to database",
@@ -114,9 +227,12 @@ class Database:
                         ssl=ssl_ctx,
                         timeout=self.connect_timeout,
                         command_timeout=self.command_timeout,
-                        statement_cache_size=0 if self.disable_statement_cache else 100,
-                        min_size=1,
-                        max_size=5,
+                        statement_cache_size=0
+                        if self.disable_statement_cache
+                        else STATEMENT_CACHE_SIZE,
+                        min_size=self.pool_min_size,
+                        max_size=self.pool_max_size,
+                        max_inactive_connection_lifetime=self.pool_recycle_seconds,
                     )
                     self.logger.info(
                         "Connected to database", ssl_enabled=bool(self.use_ssl)
@@ -137,7 +253,12 @@ class Database:
                     )
                     if attempt >= self.max_retries:
                         raise
-                    await asyncio.sleep(self.retry_delay_seconds)
+                    # Exponential backoff with jitter, capped at the
+                    # configured delay: recover quickly from blips without
+                    # hammering a database that is actually down.
+                    await asyncio.sleep(
+                        min(self.retry_delay_seconds, 2**attempt + random.random())
+                    )
 
     async def close(self) -> None:
         if self.pool is not None:
@@ -148,53 +269,25 @@ class Database:
                     "Database pool close timed out, forcing terminate",
                     timeout=10.0,
                 )
-                terminate = getattr(self.pool, "terminate", None)
-                if callable(terminate):
-                    try:
-                        maybe = terminate()
-                        if inspect.isawaitable(maybe):
-                            await maybe
-                    except Exception as exc:  # pragma: no cover - defensive
-                        self.logger.error(
-                            "Database pool terminate failed", error=str(exc)
-                        )
+                try:
+                    # asyncpg's Pool.terminate() is synchronous.
+                    self.pool.terminate()
+                except Exception as exc:  # pragma: no cover - defensive
+                    self.logger.error("Database pool terminate failed", error=str(exc))
             self.pool = None
             self.logger.info("Database connection closed")
 
-    @asynccontextmanager
-    async def _acquire_connection(self):
-        pool = self._require_pool()
-        resource = pool.acquire()
-
-        if hasattr(resource, "__aenter__"):
-            async with resource as conn:
-                yield conn
-            return
-
-        if inspect.isawaitable(resource):
-            conn = await resource
-        else:
-            conn = resource
-
-        if hasattr(conn, "__aenter__"):
-            async with conn as managed:
-                yield managed
-            return
-
-        try:
-            yield conn
-        finally:
-            release = getattr(pool, "release", None)
-            if callable(release):
-                maybe_awaitable = release(conn)
-                if inspect.isawaitable(maybe_awaitable):
-                    await maybe_awaitable
+    def _acquire_connection(self):
+        # pool.acquire() already returns an async context manager; test
+        # doubles are expected to do the same.
+        return self._require_pool().acquire()
 
     async def setup(self) -> None:
         await self.connect()
         async with self._acquire_connection() as conn:
             await conn.execute(CREATE_POSTS_TABLE)
             await conn.execute(CREATE_POSTS_INDEX)
+            await conn.execute(CREATE_POSTS_PARTIAL_INDEX)
             await conn.execute(CREATE_SESSION_TABLE)
             await conn.execute(CREATE_CONFIG_TABLE)
         self.logger.info("Database schema ensured")
@@ -206,32 +299,37 @@ class Database:
         post_date: datetime,
         content_preview: Optional[str] = None,
     ) -> None:
-        await self.connect()
-        query = """
-        INSERT INTO repost_posts (message_id, channel_id, post_date, content_preview)
-        VALUES ($1, $2, $3, $4)
-        ON CONFLICT (message_id) DO UPDATE
-        SET channel_id = EXCLUDED.channel_id,
-            post_date = EXCLUDED.post_date,
-            content_preview = EXCLUDED.content_preview;
-        """
         async with self._acquire_connection() as conn:
             await conn.execute(
-                query, message_id, channel_id, post_date, content_preview
+                UPSERT_POST_SQL, message_id, channel_id, post_date, content_preview
             )
-        self.logger.debug("Saved post metadata", message_id=message_id)
+        self._invalidate_counts()
 
-    async def get_random_unreposted_post(self) -> Optional[Dict[str, Any]]:
-        await self.connect()
-        query = """
-        SELECT id, message_id, channel_id, post_date
-        FROM repost_posts
-        WHERE is_reposted = FALSE
-        ORDER BY random()
-        LIMIT 1;
+    async def upsert_posts_bulk(
+        self, rows: List[Tuple[int, int, datetime, Optional[str]]]
+    ) -> None:
+        """Upsert a batch of post rows in a single connection acquisition.
+
+        Each row is (message_id, channel_id, post_date, content_preview).
+        Collapses N round-trips into one ``executemany`` pipeline.
         """
+        if not rows:
+            return
         async with self._acquire_connection() as conn:
-            row = await conn.fetchrow(query)
+            await conn.executemany(UPSERT_POST_SQL, rows)
+        self._invalidate_counts()
+        self.logger.debug("Saved post metadata batch", count=len(rows))
+
+    async def get_random_unreposted_post(self) -> Optional[Dict[str, Any]]:
+        # Keyset sampling: seek to a random point in the id range instead of
+        # ORDER BY random(), which sorts every unreposted row on each call.
+        # The seek point can land past the last unreposted id; fall back to
+        # the first unreposted row so a non-empty backlog never comes back
+        # empty-handed.
+        async with self._acquire_connection() as conn:
+            row = await conn.fetchrow(RANDOM_UNREPOSTED_SQL)
+            if row is None:
+                row = await conn.fetchrow(FIRST_UNREPOSTED_SQL)
             if row:
                 return dict(row)
         return None
@@ -239,76 +337,92 @@ class Database:
     async def mark_reposted(
         self, message_id: int, when: Optional[datetime] = None
     ) -> None:
-        await self.connect()
-        query = """
-        UPDATE repost_posts
-        SET is_reposted = TRUE,
-            reposted_at = COALESCE($2, CURRENT_TIMESTAMP)
-        WHERE message_id = $1;
-        """
         async with self._acquire_connection() as conn:
-            await conn.execute(query, message_id, when)
+            await conn.execute(MARK_REPOSTED_SQL, message_id, when)
+        self._invalidate_counts()
         self.logger.info("Post marked reposted", message_id=message_id)
 
     async def count_unreposted(self) -> int:
-        await self.connect()
-        query = "SELECT COUNT(*) FROM repost_posts WHERE is_reposted = FALSE;"
+        cached = self._cached_count("unreposted")
+        if cached is not None:
+            return cached
         async with self._acquire_connection() as conn:
-            return int(await conn.fetchval(query))
+            value = int(await conn.fetchval(COUNT_UNREPOSTED_SQL))
+        return self._store_count("unreposted", value)
 
     async def count_posts(self) -> int:
-        await self.connect()
-        query = "SELECT COUNT(*) FROM repost_posts;"
+        cached = self._cached_count("total")
+        if cached is not None:
+            return cached
         async with self._acquire_connection() as conn:
-            return int(await conn.fetchval(query))
+            value = int(await conn.fetchval(COUNT_POSTS_SQL))
+        return self._store_count("total", value)
 
-    async def latest_repost_time(self) -> Optional[datetime]:
-        await self.connect()
-        query = """
-        SELECT reposted_at FROM repost_posts
-        WHERE reposted_at IS NOT NULL
-        ORDER BY reposted_at DESC
-        LIMIT 1;
+    async def initialization_snapshot(self) -> Tuple[Optional[str], int]:
+        """Fetch initialized_at and the post count in one round-trip.
+
+        Startup blocks on this decision, so both subqueries ride a single
+        fetchrow instead of two sequential calls.
         """
         async with self._acquire_connection() as conn:
-            value = await conn.fetchval(query)
+            row = await conn.fetchrow(INITIALIZATION_SNAPSHOT_SQL)
+        if row is None:
+            return None, 0
+        return row["initialized_at"], int(row["post_count"] or 0)
+
+    async def max_message_id(self) -> int:
+        """Highest message_id already stored; 0 when the table is empty."""
+        async with self._acquire_connection() as conn:
+            return int(await conn.fetchval(MAX_MESSAGE_ID_SQL) or 0)
+
+    async def latest_repost_time(self) -> Optional[datetime]:
+        async with self._acquire_connection() as conn:
+            value = await conn.fetchval(LATEST_REPOST_SQL)
             return value
 
     async def save_session_bytes(self, data: bytes) -> None:
-        await self.connect()
-        query = """
-        INSERT INTO repost_session (key, value, updated_at)
-        VALUES ($1, $2, CURRENT_TIMESTAMP)
-        ON CONFLICT (key) DO UPDATE
-        SET value = EXCLUDED.value,
-            updated_at = CURRENT_TIMESTAMP;
-        """
         async with self._acquire_connection() as conn:
-            await conn.execute(query, SESSION_KEY, data)
+            await conn.execute(SAVE_SESSION_SQL, SESSION_KEY, data)
         self.logger.info("Telethon session saved")
 
     async def load_session_bytes(self) -> Optional[bytes]:
-        await self.connect()
-        query = "SELECT value FROM repost_session WHERE key = $1;"
         async with self._acquire_connection() as conn:
-            value = await conn.fetchval(query, SESSION_KEY)
+            value = await conn.fetchval(LOAD_SESSION_SQL, SESSION_KEY)
             return value
 
-    async def set_config_value(self, key: str, value: str) -> None:
-        await self.connect()
-        query = """
-        INSERT INTO repost_config (key, value, updated_at)
-        VALUES ($1, $2, CURRENT_TIMESTAMP)
-        ON CONFLICT (key) DO UPDATE
-        SET value = EXCLUDED.value,
-            updated_at = CURRENT_TIMESTAMP;
+    async def try_advisory_lock(self, key: int) -> bool:
+        """Take a cluster-wide advisory lock; returns False when already held.
+
+        Advisory locks are session-scoped, so the acquiring connection is
+        held out of the pool until :meth:`advisory_unlock` releases it.
         """
+        pool = self._require_pool()
+        conn = await pool.acquire()
+        try:
+            locked = bool(await conn.fetchval(TRY_ADVISORY_LOCK_SQL, key))
+        except Exception:
+            await pool.release(conn)
+            raise
+        if locked:
+            self._advisory_connections[key] = conn
+            return True
+        await pool.release(conn)
+        return False
+
+    async def advisory_unlock(self, key: int) -> None:
+        conn = self._advisory_connections.pop(key, None)
+        if conn is None:
+            return
+        try:
+            await conn.fetchval(ADVISORY_UNLOCK_SQL, key)
+        finally:
+            await self._require_pool().release(conn)
+
+    async def set_config_value(self, key: str, value: str) -> None:
         async with self._acquire_connection() as conn:
-            await conn.execute(query, key, value)
+            await conn.execute(SET_CONFIG_SQL, key, value)
 
     async def get_config_value(self, key: str) -> Optional[str]:
-        await self.connect()
-        query = "SELECT value FROM repost_config WHERE key = $1;"
         async with self._acquire_connection() as conn:
-            value = await conn.fetchval(query, key)
+            value = await conn.fetchval(GET_CONFIG_SQL, key)
             return value
@@ -1,47 +1,119 @@
 from __future__ import annotations
 
-import asyncio
 import logging
+import queue
 import sys
+import threading
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime, timezone
-from typing import Optional
+from typing import BinaryIO, Optional, cast
 from contextlib import asynccontextmanager
 
+import orjson
 import structlog
 import uvicorn
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import ORJSONResponse, Response
 
 from .bot_client import BotClient
-from .config import Config, ConfigError, load_config
+from .config import Config, load_config
 from .database import Database
 from .scheduler import Scheduler
 from .user_client import UserClient
 
 LOGGER_NAME = "repost.main"
 
+# orjson rejects arbitrary objects; default=str lets call sites pass raw
+# values (exceptions, datetimes) and defer any formatting to emit time.
+_json_dumps = partial(orjson.dumps, default=str)
 
-def configure_logging(level: str = "INFO") -> None:
-    logging.basicConfig(
-        level=getattr(logging, level.upper(), logging.INFO),
-        format="%(message)s",
-        stream=sys.stdout,
-    )
+# Arbitrary but stable key for the Postgres advisory lock that serializes
+# reposting across all workers/processes sharing the database.
+REPOST_LOCK_KEY = 0x7265706F
+
+
+class _QueueByteWriter:
+    """File-like sink for structlog's BytesLogger.
+
+    ``write`` only enqueues the rendered line; a daemon thread owns the
+    blocking stdout write. This gives the app's own structlog output the
+    same off-loop treatment QueueHandler/QueueListener give stdlib
+    records.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._drain, name="structlog-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, data: bytes) -> None:
+        self._queue.put(data)
+
+    def flush(self) -> None:
+        # The drain thread flushes after every line; BytesLogger just
+        # needs the attribute to exist.
+        return None
+
+    def _drain(self) -> None:
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            self._stream.write(data)
+            self._stream.flush()
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+
+
+class _LoggingRuntime:
+    """Handle over the background logging threads started at configure time."""
+
+    def __init__(self, listener: QueueListener, writer: _QueueByteWriter):
+        self.listener = listener
+        self.writer = writer
+
+    def stop(self) -> None:
+        self.listener.stop()
+        self.writer.stop()
+
+
+def configure_logging(level: str = "INFO") -> _LoggingRuntime:
+    numeric_level = getattr(logging, level.upper(), logging.INFO)
+    # Both log paths leave the event loop: stdlib records go through a
+    # QueueHandler to a listener thread, and structlog's rendered bytes go
+    # through _QueueByteWriter to a writer thread — the emitting coroutine
+    # only ever enqueues; the (potentially blocking) stdout writes happen
+    # on the background threads.
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(numeric_level)
+    root.handlers.clear()
+    root.addHandler(QueueHandler(log_queue))
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    writer = _QueueByteWriter(sys.stdout.buffer)
     structlog.configure(
         processors=[
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.add_logger_name,
-            structlog.processors.StackInfoRenderer(),
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+            structlog.processors.add_log_level,
             structlog.processors.format_exc_info,
-            structlog.processors.dict_tracebacks,
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=_json_dumps),
         ],
-        wrapper_class=structlog.stdlib.BoundLogger,
+        wrapper_class=structlog.make_filtering_bound_logger(numeric_level),
         context_class=dict,
-        logger_factory=structlog.stdlib.LoggerFactory(),
+        # cast: BytesLogger only touches write/flush, which the writer has.
+        logger_factory=structlog.BytesLoggerFactory(file=cast(BinaryIO, writer)),
         cache_logger_on_first_use=True,
     )
+    return _LoggingRuntime(listener, writer)
 
 
 def create_app(
@@ -52,41 +124,54 @@ def create_app(
     scheduler: Optional[Scheduler] = None,
 ) -> FastAPI:
     config = config or load_config()
-    configure_logging(config.log_level)
-    logger = structlog.get_logger(LOGGER_NAME)
+    log_runtime = configure_logging(config.log_level)
+    logger = structlog.get_logger().bind(logger=LOGGER_NAME)
 
     database = database or Database(
         config.database_url,
-        logger=structlog.get_logger("repost.database"),
+        logger=structlog.get_logger().bind(logger="repost.database"),
         max_retries=config.max_retries,
         retry_delay_seconds=config.retry_delay_seconds,
         use_ssl=config.database_ssl,
         connect_timeout=config.database_connect_timeout,
         command_timeout=config.database_command_timeout,
         disable_statement_cache=config.database_disable_statement_cache,
+        pool_min_size=config.database_pool_min_size,
+        pool_max_size=config.database_pool_max_size,
+        pool_recycle_seconds=config.database_pool_recycle_seconds,
     )
     bot_client = bot_client or BotClient(
         config.telegram_bot_token,
-        logger=structlog.get_logger("repost.bot_client"),
+        logger=structlog.get_logger().bind(logger="repost.bot_client"),
     )
     user_client = user_client or UserClient(
         config,
         database,
-        logger=structlog.get_logger("repost.user_client"),
+        logger=structlog.get_logger().bind(logger="repost.user_client"),
     )
     scheduler = scheduler or Scheduler(
         config,
         database,
         user_client,
         bot_client,
-        logger=structlog.get_logger("repost.scheduler"),
+        logger=structlog.get_logger().bind(logger="repost.scheduler"),
     )
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         try:
+            # Create the pool before anything else so min_size connections
+            # are warm before the first request or Telethon call arrives.
+            await database.connect()
             logger.info("App startup: scheduler initialize")
             await scheduler.initialize()
+            if config.webhook_url and config.webhook_secret:
+                try:
+                    await bot_client.set_webhook(
+                        f"{config.webhook_url.rstrip('/')}/webhook/{config.webhook_secret}"
+                    )
+                except Exception as exc:  # pragma: no cover - network-specific
+                    logger.error("Webhook registration failed", error=str(exc))
         except (
             Exception
         ) as exc:  # pragma: no cover - startup issues are runtime-specific
@@ -97,11 +182,16 @@ def create_app(
         await database.close()
         await bot_client.close()
         await user_client.stop()
+        log_runtime.stop()
 
-    app = FastAPI(title="Telegram Repost Bot", version="0.1.0", lifespan=lifespan)
-    repost_lock = asyncio.Lock()
+    app = FastAPI(
+        title="Telegram Repost Bot",
+        version="0.1.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
+    )
 
-    @app.get("/", response_class=JSONResponse)
+    @app.get("/")
     async def root() -> dict:
         return {"status": "ok", "message": "see /health and /trigger_repost"}
 
@@ -124,19 +214,31 @@ def create_app(
         response.update(metrics)
         return response
 
+    @app.post("/webhook/{secret}")
+    async def webhook(secret: str, payload: dict) -> dict:
+        if not config.webhook_secret or secret != config.webhook_secret:
+            raise HTTPException(status_code=403, detail="Invalid webhook secret")
+        post = await scheduler.ingest_update(payload)
+        if not post:
+            return {"status": "ignored"}
+        return {"status": "ok", "message_id": post["message_id"]}
+
     @app.post("/trigger_repost")
     async def trigger_repost() -> dict:
-        if repost_lock.locked():
+        # A Postgres advisory lock serializes reposting cluster-wide, so
+        # multi-worker deployments cannot dequeue the same post twice.
+        if not await database.try_advisory_lock(REPOST_LOCK_KEY):
             raise HTTPException(status_code=429, detail="Repost already in progress")
 
-        async with repost_lock:
-            try:
-                post = await scheduler.repost_once()
-            except (
-                Exception
-            ) as exc:  # pragma: no cover - depends on Telegram connectivity
-                logger.error("Repost failed", error=str(exc))
-                raise HTTPException(status_code=500, detail="Repost failed") from exc
+        try:
+            post = await scheduler.repost_once()
+        except (
+            Exception
+        ) as exc:  # pragma: no cover - depends on Telegram connectivity
+            logger.error("Repost failed", error=str(exc))
+            raise HTTPException(status_code=500, detail="Repost failed") from exc
+        finally:
+            await database.advisory_unlock(REPOST_LOCK_KEY)
 
         if not post:
             return {"status": "skipped", "reason": "no posts available"}
@@ -146,13 +248,20 @@ def create_app(
     return app
 
 
-try:
-    app = create_app()
-except ConfigError:
-    # Fallback app to allow import without env during tests; real app is created in __main__ with proper env.
-    app = FastAPI(title="Telegram Repost Bot", version="0.1.0")
+def get_app() -> FastAPI:
+    """Uvicorn factory entrypoint; builds the app once per worker."""
+    return create_app()
 
 
 if __name__ == "__main__":
     cfg = load_config()
-    uvicorn.run("src.main:app", host="0.0.0.0", port=cfg.port, reload=False)
+    uvicorn.run(
+        "src.main:get_app",
+        factory=True,
+        host="0.0.0.0",
+        port=cfg.port,
+        loop="uvloop",
+        http="httptools",
+        workers=cfg.workers,
+        reload=False,
+    )
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import asyncio
+import random
+
+__all__ = ["retry_sleep"]
+
+# Upper bound on a single backoff delay no matter how many attempts failed.
+MAX_DELAY_SECONDS = 300.0
+
+
+async def retry_sleep(base_delay: float, attempt: int) -> None:
+    """Sleep before retry ``attempt`` with exponential backoff and jitter.
+
+    ``attempt`` is 1-based: the first retry waits around ``base_delay``,
+    each further retry doubles it up to :data:`MAX_DELAY_SECONDS`. The
+    0.5-1.0x jitter keeps workers retrying a shared outage from waking
+    up in lockstep.
+    """
+    delay = min(base_delay * (2 ** (attempt - 1)), MAX_DELAY_SECONDS)
+    await asyncio.sleep(delay * (0.5 + random.random() * 0.5))
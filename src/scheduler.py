@@ -1,158 +1,206 @@
-from __future__ import annotations
-
-import asyncio
-from datetime import datetime, timezone
-from typing import Optional, Union
-
-import structlog
-from telegram.error import TelegramError
-
-from .bot_client import BotClient
-from .config import Config
-from .database import Database
-from .user_client import UserClient
-
-LOGGER_NAME = "repost.scheduler"
-
-
-class Scheduler:
-    def __init__(
-        self,
-        config: Config,
-        database: Database,
-        user_client: UserClient,
-        bot_client: BotClient,
-        logger: Optional[structlog.stdlib.BoundLogger] = None,
-    ):
-        self.config = config
-        self.database = database
-        self.user_client = user_client
-        self.bot_client = bot_client
-        self.logger = logger or structlog.get_logger(LOGGER_NAME)
-
-    @staticmethod
-    def _format_bot_channel_id(source: Union[int, str]) -> str:
-        if isinstance(source, int):
-            if source > 0 and not str(source).startswith("-100"):
-                return f"-100{source}"
-            return str(source)
-        return source if source.startswith("@") else f"@{source}"
-
-    def _resolve_sources(
-        self, source_ref: Union[int, str]
-    ) -> tuple[Union[int, str], str]:
-        parsed_ref: Union[int, str] = source_ref
-        if isinstance(source_ref, str) and source_ref.lstrip("-").isdigit():
-            try:
-                parsed_ref = int(source_ref)
-            except ValueError:
-                parsed_ref = source_ref
-        bot_formatted = self._format_bot_channel_id(parsed_ref)
-        return parsed_ref, bot_formatted
-
-    async def initialize(self) -> None:
-        self.logger.info("Scheduler initialize start")
-        await self.database.setup()
-        await self.user_client.start()
-        initialized_at = None
-        if hasattr(self.database, "get_config_value"):
-            initialized_at = await self.database.get_config_value("initialized_at")
-        post_count = await self.database.count_posts()
-        if post_count > 0:
-            self.logger.info(
-                "Initialization skipped",
-                posts=post_count,
-                initialized_at=initialized_at,
-            )
-            return
-
-        saved = await self.user_client.fetch_posts(
-            self.config.start_datetime, self.config.end_datetime
-        )
-        await self.database.set_config_value(
-            "initialized_at", datetime.now(timezone.utc).isoformat()
-        )
-        self.logger.info("Initial fetch complete", saved=saved)
-
-    async def repost_once(self) -> Optional[dict]:
-        post = await self.database.get_random_unreposted_post()
-        if not post:
-            self.logger.info("No unreposted posts available")
-            return None
-
-        attempt = 0
-        last_error: Optional[Exception] = None
-        while attempt < self.config.max_retries:
-            attempt += 1
-            try:
-                await self._copy_and_mark(post)
-                return post
-            except Exception as exc:  # pragma: no cover - depends on network
-                last_error = exc
-                if attempt >= self.config.max_retries:
-                    break
-                self.logger.warning(
-                    "Retrying repost",
-                    message_id=post.get("message_id"),
-                    attempt=attempt,
-                    error=str(exc),
-                )
-                await asyncio.sleep(self.config.retry_delay_seconds)
-
-        if last_error:
-            raise last_error
-        return None
-
-    async def _copy_and_mark(self, post: dict) -> None:
-        message_id = post["message_id"]
-        source_ref: Union[int, str] = (
-            post.get("channel_id") or self.config.source_channel
-        )
-        source_for_user, source_for_bot = self._resolve_sources(source_ref)
-
-        # Ensure Telethon knows the entity
-        user_lookup = source_for_user
-        if self.user_client.client:
-            try:
-                await self.user_client.client.get_entity(user_lookup)
-            except Exception:
-                user_lookup = self.config.source_channel
-
-            message = await self.user_client.client.get_messages(
-                user_lookup, ids=message_id
-            )
-            if not message:
-                self.logger.warning(
-                    "Message missing in source channel", message_id=message_id
-                )
-                await self.database.mark_reposted(message_id)
-                return
-        try:
-            await self.bot_client.copy_post(
-                target_channel_id=self.config.target_channel_id,
-                source_channel=source_for_bot,
-                message_id=message_id,
-            )
-        except TelegramError as exc:
-            error_text = str(exc).lower()
-            if (
-                "message to copy not found" in error_text
-                or "message to forward not found" in error_text
-            ):
-                self.logger.warning(
-                    "Message missing in source channel", message_id=message_id
-                )
-                await self.database.mark_reposted(message_id)
-                return
-            raise
-        await self.database.mark_reposted(message_id)
-
-    async def health(self) -> dict:
-        last_repost = await self.database.latest_repost_time()
-        return {
-            "database": "connected",
-            "telegram_user_api": await self.user_client.status(),
-            "telegram_bot_api": await self.bot_client.status(),
-            "unpublished_posts": await self.database.count_unreposted(),
-            "last_repost": last_repost.isoformat() if last_repost else None,
-        }
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+import structlog
+
+from .bot_client import BotClient, MessageMissingError
+from .config import Config
+from .database import Database
+from .retry import retry_sleep
+from .user_client import UserClient
+
+__all__ = ["Scheduler"]
+
+LOGGER_NAME = "repost.scheduler"
+
+# How long a computed /health payload stays fresh before probes re-run.
+HEALTH_CACHE_TTL_SECONDS = 2.0
+
+
+class Scheduler:
+    def __init__(
+        self,
+        config: Config,
+        database: Database,
+        user_client: UserClient,
+        bot_client: BotClient,
+        logger: Optional[structlog.typing.FilteringBoundLogger] = None,
+    ):
+        self.config = config
+        self.database = database
+        self.user_client = user_client
+        self.bot_client = bot_client
+        self.logger = logger or structlog.get_logger().bind(logger=LOGGER_NAME)
+        self._health_cache: Optional[tuple[float, dict]] = None
+        self._health_lock = asyncio.Lock()
+
+    @staticmethod
+    def _format_bot_channel_id(source: Union[int, str]) -> str:
+        if isinstance(source, int):
+            if source > 0 and not str(source).startswith("-100"):
+                return f"-100{source}"
+            return str(source)
+        return source if source.startswith("@") else f"@{source}"
+
+    def _resolve_sources(
+        self, source_ref: Union[int, str]
+    ) -> tuple[Union[int, str], str]:
+        parsed_ref: Union[int, str] = source_ref
+        if isinstance(source_ref, str) and source_ref.lstrip("-").isdigit():
+            try:
+                parsed_ref = int(source_ref)
+            except ValueError:
+                parsed_ref = source_ref
+        bot_formatted = self._format_bot_channel_id(parsed_ref)
+        return parsed_ref, bot_formatted
+
+    async def initialize(self) -> None:
+        self.logger.info("Scheduler initialize start")
+        await self.database.setup()
+        await self.user_client.start()
+        # One round-trip for both facts; fall back to separate calls for
+        # test doubles that only implement the narrow interface.
+        if hasattr(self.database, "initialization_snapshot"):
+            initialized_at, post_count = await self.database.initialization_snapshot()
+        else:
+            initialized_at = None
+            if hasattr(self.database, "get_config_value"):
+                initialized_at = await self.database.get_config_value("initialized_at")
+            post_count = await self.database.count_posts()
+        if post_count > 0:
+            self.logger.info(
+                "Initialization skipped",
+                posts=post_count,
+                initialized_at=initialized_at,
+            )
+            return
+
+        saved = await self.user_client.fetch_posts(
+            self.config.start_datetime, self.config.end_datetime
+        )
+        await self.database.set_config_value(
+            "initialized_at", datetime.now(timezone.utc).isoformat()
+        )
+        self.logger.info("Initial fetch complete", saved=saved)
+
+    async def poll_updates(self) -> int:
+        """Poll Bot API updates once, persisting the offset across restarts.
+
+        The last confirmed update_id lives in the config table so a
+        restarted process resumes after it instead of re-fetching and
+        re-filtering updates it already saw.
+        """
+        raw = await self.database.get_config_value("bot_last_update_id")
+        last_update_id = int(raw) if raw else None
+        posts, latest_update_id = await self.bot_client.fetch_channel_posts(
+            self.config.source_channel,
+            self.config.start_datetime,
+            self.config.end_datetime,
+            self.config.timezone,
+            last_update_id=last_update_id,
+        )
+        for post in posts:
+            await self.database.upsert_post_metadata(**post)
+        if latest_update_id is not None and latest_update_id != last_update_id:
+            await self.database.set_config_value(
+                "bot_last_update_id", str(latest_update_id)
+            )
+        return len(posts)
+
+    async def ingest_update(self, payload: dict) -> Optional[dict]:
+        """Store one webhook-pushed channel_post update if it fits the window."""
+        post = self.bot_client.extract_channel_post(
+            payload,
+            self.config.source_channel,
+            self.config.start_datetime,
+            self.config.end_datetime,
+            self.config.timezone,
+        )
+        if not post:
+            return None
+        await self.database.upsert_post_metadata(**post)
+        return post
+
+    async def repost_once(self) -> Optional[dict]:
+        post = await self.database.get_random_unreposted_post()
+        if not post:
+            self.logger.info("No unreposted posts available")
+            return None
+
+        attempt = 0
+        last_error: Optional[Exception] = None
+        while attempt < self.config.max_retries:
+            attempt += 1
+            try:
+                await self._copy_and_mark(post)
+                return post
+            except Exception as exc:  # pragma: no cover - depends on network
+                last_error = exc
+                if attempt >= self.config.max_retries:
+                    break
+                self.logger.warning(
+                    "Retrying repost",
+                    message_id=post.get("message_id"),
+                    attempt=attempt,
+                    error=exc,
+                )
+                await retry_sleep(self.config.retry_delay_seconds, attempt)
+
+        if last_error:
+            raise last_error
+        return None
+
+    async def _copy_and_mark(self, post: dict) -> None:
+        message_id = post["message_id"]
+        source_ref: Union[int, str] = (
+            post.get("channel_id") or self.config.source_channel
+        )
+        _, source_for_bot = self._resolve_sources(source_ref)
+
+        # copy_post is the single authoritative existence check: a missing
+        # source message surfaces as MessageMissingError, so no Telethon
+        # get_messages pre-flight round-trip is needed.
+        try:
+            await self.bot_client.copy_post(
+                target_channel_id=self.config.target_channel_id,
+                source_channel=source_for_bot,
+                message_id=message_id,
+            )
+        except MessageMissingError:
+            self.logger.warning(
+                "Message missing in source channel", message_id=message_id
+            )
+            await self.database.mark_reposted(message_id)
+            return
+        await self.database.mark_reposted(message_id)
+
+    async def health(self) -> dict:
+        # Liveness probes and UI tabs poll /health aggressively; serve a
+        # short-lived cached payload so each hit does not fan out to the
+        # database and both Telegram APIs.
+        cached = self._health_cache
+        if cached and time.monotonic() - cached[0] < HEALTH_CACHE_TTL_SECONDS:
+            return cached[1]
+        async with self._health_lock:
+            cached = self._health_cache
+            if cached and time.monotonic() - cached[0] < HEALTH_CACHE_TTL_SECONDS:
+                return cached[1]
+            last_repost, user_status, bot_status, unpublished = await asyncio.gather(
+                self.database.latest_repost_time(),
+                self.user_client.status(),
+                self.bot_client.status(),
+                self.database.count_unreposted(),
+            )
+            metrics = {
+                "database": "connected",
+                "telegram_user_api": user_status,
+                "telegram_bot_api": bot_status,
+                "unpublished_posts": unpublished,
+                "last_repost": last_repost.isoformat() if last_repost else None,
+            }
+            self._health_cache = (time.monotonic(), metrics)
+            return metrics
@@ -1,272 +1,503 @@
-from __future__ import annotations
-
-import asyncio
-from datetime import datetime
-from typing import Optional
-
-import structlog
-from telethon import TelegramClient
-from telethon.errors import (
-    FloodWaitError,
-    PhoneCodeExpiredError,
-    PhoneCodeInvalidError,
-    SessionPasswordNeededError,
-)
-from telethon.sessions import StringSession
-
-from .config import Config
-from .database import Database
-
-LOGGER_NAME = "repost.user_client"
-
-
-class DatabaseSession(StringSession):
-    def __init__(self, database: Database, session_string: Optional[str] = None):
-        super().__init__(session_string)
-        self.database = database
-
-    @classmethod
-    async def from_db(cls, database: Database) -> "DatabaseSession":
-        session_bytes = await database.load_session_bytes()
-        session_string = session_bytes.decode() if session_bytes else None
-        return cls(database, session_string)
-
-    @classmethod
-    async def from_env_or_db(
-        cls, database: Database, session_string: Optional[str] = None
-    ) -> "DatabaseSession":
-        if session_string:
-            return cls(database, session_string)
-        return await cls.from_db(database)
-
-    async def save_to_db(self) -> None:
-        session_string = super().save()
-        await self.database.save_session_bytes(session_string.encode())
-
-
-class UserClient:
-    def __init__(
-        self,
-        config: Config,
-        database: Database,
-        logger: Optional[structlog.stdlib.BoundLogger] = None,
-        client: Optional[TelegramClient] = None,
-    ):
-        self.config = config
-        self.database = database
-        self.logger = logger or structlog.get_logger(LOGGER_NAME)
-        self.client = client
-        self.connected = False
-
-    @staticmethod
-    def _normalize_channel_id(message: object, channel: object) -> int:
-        peer = getattr(message, "peer_id", None) or getattr(message, "to_id", None)
-        raw_id: int | str | None = 0
-        if peer:
-            raw_id = getattr(peer, "channel_id", None) or getattr(peer, "chat_id", None)
-        else:
-            raw_id = getattr(channel, "id", 0) or 0
-
-        if raw_id is None:
-            raw_id = 0
-
-        try:
-            channel_id = int(raw_id)
-        except (TypeError, ValueError):
-            return 0
-
-        # Preserve existing -100 prefix; add it for positive ids so Bot API can resolve.
-        if str(channel_id).startswith("-100"):
-            return channel_id
-        if channel_id > 0:
-            return int(f"-100{channel_id}")
-        return channel_id
-
-    async def start(self) -> None:
-        self.logger.info("User client start")
-        await self.database.connect()
-        session = await DatabaseSession.from_env_or_db(
-            self.database, self.config.telegram_session_string
-        )
-        if (
-            self.config.telegram_session_string
-            and not await self.database.load_session_bytes()
-        ):
-            await self.database.save_session_bytes(
-                self.config.telegram_session_string.encode()
-            )
-
-        if self.client is None:
-            self.client = TelegramClient(
-                session,
-                api_id=self.config.telegram_api_id,
-                api_hash=self.config.telegram_api_hash,
-            )
-
-        attempt = 0
-        last_error: Optional[Exception] = None
-        while attempt < self.config.max_retries:
-            attempt += 1
-            try:
-                self.logger.info(
-                    "Connecting Telethon client",
-                    attempt=attempt,
-                    phone=self.config.telegram_phone,
-                )
-                await self.client.connect()
-                self.connected = True
-                if await self.client.is_user_authorized():
-                    await session.save_to_db()
-                    self.logger.info("User client connected")
-                    return
-
-                code_hash = await self.database.get_config_value(
-                    "telethon_phone_code_hash"
-                )
-                if not code_hash:
-                    try:
-                        sent = await self.client.send_code_request(
-                            self.config.telegram_phone
-                        )
-                        await self.database.set_config_value(
-                            "telethon_phone_code_hash", sent.phone_code_hash
-                        )
-                    except FloodWaitError as exc:
-                        await self.database.set_config_value(
-                            "telethon_phone_code_hash", ""
-                        )
-                        raise RuntimeError(
-                            f"Telegram rate limit: wait {exc.seconds} seconds before "
-                            "requesting a new code"
-                        ) from exc
-
-                    raise RuntimeError(
-                        "Authorization code sent. Set TELEGRAM_AUTH_CODE from the latest "
-                        "SMS/Telegram message and restart."
-                    )
-
-                # Safety: if hash is empty but we got here, force re-request.
-                if code_hash == "":
-                    raise RuntimeError(
-                        "Authorization code sent. Set TELEGRAM_AUTH_CODE from the latest "
-                        "SMS/Telegram message and restart."
-                    )
-
-                if not self.config.telegram_auth_code:
-                    raise RuntimeError(
-                        "TELEGRAM_AUTH_CODE is required to complete authorization; set it "
-                        "to the latest code and restart."
-                    )
-
-                code = self.config.telegram_auth_code.strip()
-                try:
-                    await self.client.sign_in(
-                        self.config.telegram_phone,
-                        code=code,
-                        phone_code_hash=code_hash,
-                    )
-                    await self.database.set_config_value("telethon_phone_code_hash", "")
-                    await session.save_to_db()
-                    self.logger.info("User client connected")
-                    return
-                except (PhoneCodeInvalidError, PhoneCodeExpiredError) as exc:
-                    await self.database.set_config_value("telethon_phone_code_hash", "")
-                    raise RuntimeError(
-                        "TELEGRAM_AUTH_CODE is invalid or expired; request a new code, "
-                        "update env, and restart"
-                    ) from exc
-                except SessionPasswordNeededError as exc:
-                    raise RuntimeError(
-                        "Two-factor authentication is enabled; provide password support or disable 2FA"
-                    ) from exc
-            except RuntimeError:
-                # Do not retry auth flow in the same run to avoid code reuse/expiry.
-                raise
-            except Exception as exc:  # pragma: no cover
-                last_error = exc
-                self.logger.warning(
-                    "User client connect failed", error=str(exc), attempt=attempt
-                )
-                if attempt >= self.config.max_retries:
-                    break
-                await asyncio.sleep(self.config.retry_delay_seconds)
-
-        if last_error:
-            raise last_error
-
-    async def stop(self) -> None:
-        if self.client is not None:
-            await self.client.disconnect()
-            self.connected = False
-
-    async def persist_session(self) -> None:
-        if self.client is None:
-            return
-        session = self.client.session
-        if isinstance(session, DatabaseSession):
-            await session.save_to_db()
-        else:
-            session_string = session.save()
-            await self.database.save_session_bytes(session_string.encode())
-
-    async def fetch_posts(self, start_date: datetime, end_date: datetime) -> int:
-        if not self.connected:
-            await self.start()
-
-        if self.client is None:
-            raise RuntimeError("Telethon client is not initialized")
-
-        saved = 0
-        attempt = 0
-        while attempt < self.config.max_retries:
-            attempt += 1
-            try:
-                channel = await self.client.get_entity(self.config.source_channel)
-                start_day = start_date.astimezone(self.config.timezone).date()
-                end_day = end_date.astimezone(self.config.timezone).date()
-                # Iterate from newest to oldest; break when older than start_day.
-                async for message in self.client.iter_messages(channel):
-                    if not message or not getattr(message, "date", None):
-                        continue
-                    message_date = message.date.astimezone(self.config.timezone)
-                    naive_date = message_date.replace(tzinfo=None)
-                    message_day = naive_date.date()
-
-                    if message_day < start_day:
-                        break
-                    if message_day > end_day:
-                        continue
-
-                    preview = (message.message or "")[:500]
-                    channel_id: int = self._normalize_channel_id(message, channel)
-                    await self.database.upsert_post_metadata(
-                        message_id=message.id,
-                        channel_id=channel_id,
-                        post_date=naive_date,
-                        content_preview=preview,
-                    )
-                    saved += 1
-
-                await self.persist_session()
-                self.logger.info("Messages fetched", count=saved)
-                return saved
-            except Exception as exc:  # pragma: no cover
-                self.logger.warning(
-                    "Fetch posts failed", error=str(exc), attempt=attempt
-                )
-                if attempt >= self.config.max_retries:
-                    raise
-                await asyncio.sleep(self.config.retry_delay_seconds)
-
-        return saved
-
-    async def status(self) -> str:
-        if self.client is None:
-            return "disconnected"
-        try:
-            if not self.connected:
-                return "disconnected"
-            authorized = await self.client.is_user_authorized()
-            return "connected" if authorized else "unauthorized"
-        except Exception:  # pragma: no cover
-            return "error"
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import structlog
+from telethon import TelegramClient
+from telethon.errors import (
+    ChannelInvalidError,
+    FloodWaitError,
+    PeerIdInvalidError,
+    PhoneCodeExpiredError,
+    PhoneCodeInvalidError,
+    SessionPasswordNeededError,
+)
+from telethon.sessions import StringSession
+
+from .config import Config
+from .database import Database
+from .retry import retry_sleep
+
+__all__ = ["DatabaseSession", "UserClient"]
+
+LOGGER_NAME = "repost.user_client"
+
+# How many buffered messages to write per executemany round-trip.
+UPSERT_BATCH_SIZE = 500
+
+# Stored preview is capped at this many characters.
+PREVIEW_MAX_CHARS = 500
+
+# Server-requested flood waits up to this long are slept through during
+# authorization; longer ones abort with instructions instead.
+FLOOD_WAIT_AUTH_THRESHOLD_SECONDS = 60
+
+# Cap on honoring FloodWaitError.seconds in the fetch retry loop.
+FLOOD_WAIT_FETCH_CAP_SECONDS = 600
+
+# How often to re-check for an operator-supplied auth code, and for how
+# long, before giving up on interactive authorization.
+AUTH_CODE_POLL_INTERVAL_SECONDS = 5.0
+AUTH_CODE_WAIT_TIMEOUT_SECONDS = 600.0
+
+# How long a positive authorization answer from status() stays cached
+# before is_user_authorized is asked again.
+STATUS_AUTH_CACHE_TTL_SECONDS = 30.0
+
+
+class DatabaseSession(StringSession):
+    def __init__(self, database: Database, session_string: Optional[str] = None):
+        super().__init__(session_string)
+        self.database = database
+        self._last_saved_hash: Optional[int] = None
+
+    @classmethod
+    async def from_db(cls, database: Database) -> "DatabaseSession":
+        session_bytes = await database.load_session_bytes()
+        session_string = session_bytes.decode("ascii") if session_bytes else None
+        return cls(database, session_string)
+
+    @classmethod
+    async def from_env_or_db(
+        cls, database: Database, session_string: Optional[str] = None
+    ) -> "DatabaseSession":
+        if session_string:
+            return cls(database, session_string)
+        return await cls.from_db(database)
+
+    async def save_to_db(self) -> None:
+        session_string = super().save()
+        # Telethon only mutates the session on DC migration; skip the DB
+        # write when the serialized form is unchanged since the last save.
+        session_hash = hash(session_string)
+        if session_hash == self._last_saved_hash:
+            return
+        # StringSession payloads are base64, so the ASCII fast path applies.
+        await self.database.save_session_bytes(session_string.encode("ascii"))
+        self._last_saved_hash = session_hash
+
+
+class UserClient:
+    def __init__(
+        self,
+        config: Config,
+        database: Database,
+        logger: Optional[structlog.typing.FilteringBoundLogger] = None,
+        client: Optional[TelegramClient] = None,
+    ):
+        self.config = config
+        self.database = database
+        self.logger = logger or structlog.get_logger().bind(logger=LOGGER_NAME)
+        self.client = client
+        self.connected = False
+        self.source_entity: Optional[object] = None
+        self._last_session_hash: Optional[int] = None
+        self._authorized = False
+        self._auth_cached_until = 0.0
+        # Telethon dates are already UTC-aware; when the configured zone is
+        # UTC too, astimezone would be a per-message no-op worth skipping.
+        tz = config.timezone
+        self._tz_is_utc = tz is timezone.utc or getattr(
+            tz, "key", getattr(tz, "zone", None)
+        ) in ("UTC", "Etc/UTC")
+
+    @staticmethod
+    def _normalize_channel_id(message: object, channel: object) -> int:
+        peer = getattr(message, "peer_id", None) or getattr(message, "to_id", None)
+        raw_id: int | str | None = 0
+        if peer:
+            raw_id = getattr(peer, "channel_id", None) or getattr(peer, "chat_id", None)
+        else:
+            raw_id = getattr(channel, "id", 0) or 0
+
+        if raw_id is None:
+            raw_id = 0
+
+        try:
+            channel_id = int(raw_id)
+        except (TypeError, ValueError):
+            return 0
+
+        # Preserve existing -100 prefix; add it for positive ids so Bot API
+        # can resolve. Pure arithmetic — no per-message string formatting.
+        if channel_id <= -1_000_000_000_000:  # already carries the -100 prefix
+            return channel_id
+        if channel_id > 0:
+            return -1_000_000_000_000 - channel_id
+        return channel_id
+
+    async def start(self) -> None:
+        self.logger.info("User client start")
+        await self.database.connect()
+        session = await DatabaseSession.from_env_or_db(
+            self.database, self.config.telegram_session_string
+        )
+        if (
+            self.config.telegram_session_string
+            and not await self.database.load_session_bytes()
+        ):
+            await self.database.save_session_bytes(
+                self.config.telegram_session_string.encode()
+            )
+
+        if self.client is None:
+            self.client = TelegramClient(
+                session,
+                api_id=self.config.telegram_api_id,
+                api_hash=self.config.telegram_api_hash,
+            )
+
+        attempt = 0
+        last_error: Optional[Exception] = None
+        while attempt < self.config.max_retries:
+            attempt += 1
+            try:
+                self.logger.info(
+                    "Connecting Telethon client",
+                    attempt=attempt,
+                    phone=self.config.telegram_phone,
+                )
+                await self.client.connect()
+                self.connected = True
+                # Remember a positive authorization answer: re-asking on
+                # every reconnect attempt is an MTProto round-trip for a
+                # fact that only a sign-out can change.
+                if self._authorized or await self.client.is_user_authorized():
+                    self._authorized = True
+                    await session.save_to_db()
+                    await self.get_source_entity()
+                    self.logger.info("User client connected")
+                    return
+
+                code_hash = await self.database.get_config_value(
+                    "telethon_phone_code_hash"
+                )
+                if not code_hash:
+                    try:
+                        sent = await self.client.send_code_request(
+                            self.config.telegram_phone
+                        )
+                        code_hash = str(sent.phone_code_hash)
+                        await self.database.set_config_value(
+                            "telethon_phone_code_hash", code_hash
+                        )
+                    except FloodWaitError as exc:
+                        if exc.seconds <= FLOOD_WAIT_AUTH_THRESHOLD_SECONDS:
+                            # Short server-side waits are cheaper to sleep
+                            # through than to abort the whole run over.
+                            # Recorded as last_error so exhausting the
+                            # attempts raises instead of returning an
+                            # unauthorized client as if start() succeeded.
+                            last_error = exc
+                            self.logger.warning(
+                                "Flood wait before code request",
+                                seconds=exc.seconds,
+                            )
+                            await asyncio.sleep(max(exc.seconds, 1))
+                            continue
+                        await self.database.set_config_value(
+                            "telethon_phone_code_hash", ""
+                        )
+                        raise RuntimeError(
+                            f"Telegram rate limit: wait {exc.seconds} seconds before "
+                            "requesting a new code"
+                        ) from exc
+
+                # Wait in-process for the operator to provide the code
+                # instead of aborting; a restart would re-enter the whole
+                # auth flow and re-contact Telegram.
+                code = await self._wait_for_auth_code()
+                try:
+                    await self.client.sign_in(
+                        self.config.telegram_phone,
+                        code=code,
+                        phone_code_hash=code_hash,
+                    )
+                    await self.database.set_config_value("telethon_phone_code_hash", "")
+                    # The stored code is single-use; clearing it keeps a
+                    # future re-auth from replaying an expired code.
+                    await self.database.set_config_value("telegram_auth_code", "")
+                    self._authorized = True
+                    await session.save_to_db()
+                    self.logger.info("User client connected")
+                    return
+                except (PhoneCodeInvalidError, PhoneCodeExpiredError) as exc:
+                    await self.database.set_config_value("telethon_phone_code_hash", "")
+                    raise RuntimeError(
+                        "TELEGRAM_AUTH_CODE is invalid or expired; request a new code, "
+                        "update env, and restart"
+                    ) from exc
+                except SessionPasswordNeededError as exc:
+                    raise RuntimeError(
+                        "Two-factor authentication is enabled; provide password support or disable 2FA"
+                    ) from exc
+            except RuntimeError:
+                # Do not retry auth flow in the same run to avoid code reuse/expiry.
+                raise
+            except Exception as exc:  # pragma: no cover
+                last_error = exc
+                self.logger.warning(
+                    "User client connect failed", error=exc, attempt=attempt
+                )
+                if attempt >= self.config.max_retries:
+                    break
+                await retry_sleep(self.config.retry_delay_seconds, attempt)
+
+        if last_error:
+            raise last_error
+
+    async def _wait_for_auth_code(self) -> str:
+        """Poll for an operator-supplied auth code without restarting.
+
+        Checks the TELEGRAM_AUTH_CODE env value first, then re-reads the
+        ``telegram_auth_code`` config row until it appears or the wait
+        times out.
+        """
+        if self.config.telegram_auth_code:
+            return self.config.telegram_auth_code.strip()
+
+        self.logger.info(
+            "Authorization code sent; waiting for telegram_auth_code config value",
+            poll_interval=AUTH_CODE_POLL_INTERVAL_SECONDS,
+        )
+        deadline = time.monotonic() + AUTH_CODE_WAIT_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            code = await self.database.get_config_value("telegram_auth_code")
+            if code:
+                return code.strip()
+            await asyncio.sleep(AUTH_CODE_POLL_INTERVAL_SECONDS)
+        raise RuntimeError(
+            "Timed out waiting for the authorization code; set TELEGRAM_AUTH_CODE "
+            "or the telegram_auth_code config row and restart."
+        )
+
+    async def get_source_entity(self) -> object:
+        """Resolve the source channel entity once and reuse it.
+
+        ``get_entity`` is a Telegram RPC on a cache miss; resolving at
+        start() keeps it off the fetch and repost hot paths.
+        """
+        if self.client is None:
+            raise RuntimeError("Telethon client is not initialized")
+        if self.source_entity is None:
+            self.source_entity = await self.client.get_entity(
+                self.config.source_channel
+            )
+        return self.source_entity
+
+    async def stop(self) -> None:
+        if self.client is not None:
+            await self.client.disconnect()
+            self.connected = False
+            self._authorized = False
+            self._auth_cached_until = 0.0
+
+    async def persist_session(self) -> None:
+        if self.client is None:
+            return
+        session = self.client.session
+        if isinstance(session, DatabaseSession):
+            await session.save_to_db()
+        else:
+            # Same change-detection as DatabaseSession.save_to_db for
+            # injected plain sessions: only hit the DB when the serialized
+            # form moved.
+            session_string = session.save()
+            session_hash = hash(session_string)
+            if session_hash == self._last_session_hash:
+                return
+            await self.database.save_session_bytes(session_string.encode("ascii"))
+            self._last_session_hash = session_hash
+
+    async def fetch_posts(self, start_date: datetime, end_date: datetime) -> int:
+        if not self.connected:
+            await self.start()
+
+        if self.client is None:
+            raise RuntimeError("Telethon client is not initialized")
+        # Bound to a local after the guard: the produce() closure would
+        # otherwise re-read the Optional attribute past the narrowing.
+        client = self.client
+
+        # Hoist config lookups and the bulk-writer bound method out of the
+        # hot loop; locals are cheaper than attribute chains per message.
+        tz = self.config.timezone
+        tz_is_utc = self._tz_is_utc
+        max_retries = self.config.max_retries
+        retry_delay = self.config.retry_delay_seconds
+        upsert_bulk = self.database.upsert_posts_bulk
+        normalize_channel_id = self._normalize_channel_id
+
+        saved = 0
+        attempt = 0
+        while attempt < max_retries:
+            attempt += 1
+            saved = 0
+            try:
+                channel = await self.get_source_entity()
+                # Window bounds hoisted out of the loop: start/end are
+                # midnight-localized, so [start, end + 1 day) covers the same
+                # days, and Telethon dates are tz-aware — the comparison needs
+                # no per-message astimezone/replace round-trip.
+                window_start = start_date
+                window_end = end_date + timedelta(days=1)
+                # Skip ids already stored so a restarted backfill resumes
+                # where the previous run stopped instead of re-reading the
+                # whole window. This cursor is only sound because iteration
+                # below runs oldest→newest: the persisted rows are always a
+                # contiguous prefix of the window, so everything above
+                # max_message_id() is exactly the unread remainder.
+                last_seen_id = await self.database.max_message_id()
+                # The source channel is constant for the whole iteration, so
+                # its normalized id is too; messages without their own peer
+                # (the overwhelmingly common case here) reuse it instead of
+                # re-walking the getattr chain per message.
+                default_channel_id = normalize_channel_id(None, channel)
+                # Producer/consumer pipeline: while one batch is in flight to
+                # Postgres the producer keeps pulling the next history page,
+                # so the Telegram and DB round-trips overlap instead of
+                # alternating. The bounded queue caps buffered rows at one
+                # batch; a None sentinel signals end of history.
+                queue: asyncio.Queue[Optional[tuple]] = asyncio.Queue(
+                    maxsize=UPSERT_BATCH_SIZE
+                )
+
+                async def produce() -> None:
+                    # Iterate from oldest to newest (reverse=True): a
+                    # partially-flushed attempt then persists the lowest ids
+                    # first, keeping max_message_id() a valid resume cursor —
+                    # newest-first iteration would make min_id exclude the
+                    # entire unread older remainder after a mid-window retry.
+                    # offset_date skips everything older than the window
+                    # server-side (it is exclusive under reverse, hence the
+                    # one-second step back), we break once past the window
+                    # end, and wait_time=0 drops Telethon's inter-request
+                    # pause for large histories.
+                    async for message in client.iter_messages(
+                        channel,
+                        offset_date=window_start - timedelta(seconds=1),
+                        reverse=True,
+                        min_id=last_seen_id,
+                        wait_time=0,
+                    ):
+                        if not message or not getattr(message, "date", None):
+                            continue
+                        if message.date >= window_end:
+                            break
+                        if message.date < window_start:
+                            continue
+
+                        # Only buffered rows pay for the timezone
+                        # conversion, and UTC deployments skip it.
+                        if tz_is_utc:
+                            naive_date = message.date.replace(tzinfo=None)
+                        else:
+                            naive_date = message.date.astimezone(tz).replace(
+                                tzinfo=None
+                            )
+                        # Typical posts fit the cap; slice (and copy) only
+                        # the ones that do not. Text-less media posts
+                        # store NULL rather than an empty string.
+                        text = message.message
+                        if text and len(text) > PREVIEW_MAX_CHARS:
+                            preview: Optional[str] = text[:PREVIEW_MAX_CHARS]
+                        else:
+                            preview = text or None
+                        if (
+                            getattr(message, "peer_id", None) is None
+                            and getattr(message, "to_id", None) is None
+                        ):
+                            channel_id: int = default_channel_id
+                        else:
+                            channel_id = normalize_channel_id(message, channel)
+                        await queue.put(
+                            (message.id, channel_id, naive_date, preview)
+                        )
+                    # Sentinel only on successful completion. On a producer
+                    # failure the TaskGroup cancels the consumer instead,
+                    # whose finally still flushes the partial batch; a
+                    # sentinel put from a finally here could block forever
+                    # on a full queue nobody drains once the consumer has
+                    # died, deadlocking the whole fetch.
+                    await queue.put(None)
+
+                async def consume() -> None:
+                    nonlocal saved
+                    rows: list[tuple] = []
+                    try:
+                        while True:
+                            row = await queue.get()
+                            if row is None:
+                                return
+                            rows.append(row)
+                            # Flush in batches so a long backfill does not
+                            # hold the whole history in memory before the
+                            # first write.
+                            if len(rows) >= UPSERT_BATCH_SIZE:
+                                await upsert_bulk(rows)
+                                saved += len(rows)
+                                rows.clear()
+                    finally:
+                        # Flush the partial batch even when the pipeline
+                        # blows up: with the ascending iteration order the
+                        # persisted rows stay a contiguous prefix, so the
+                        # retried attempt resumes right past them.
+                        if rows:
+                            await upsert_bulk(rows)
+                            saved += len(rows)
+
+                async with asyncio.TaskGroup() as group:
+                    group.create_task(produce())
+                    group.create_task(consume())
+
+                await self.persist_session()
+                self.logger.info("Messages fetched", count=saved)
+                return saved
+            except Exception as exc:  # pragma: no cover
+                # TaskGroup wraps a task failure in an ExceptionGroup;
+                # unwrap a lone cause so the FloodWait and stale-entity
+                # handling below still sees the real error.
+                if isinstance(exc, ExceptionGroup) and len(exc.exceptions) == 1:
+                    exc = exc.exceptions[0]
+                # A stale memoized entity is the one thing a retry cannot
+                # fix by itself; drop it so the next attempt re-resolves.
+                if isinstance(exc, (ChannelInvalidError, PeerIdInvalidError)):
+                    self.source_entity = None
+                self.logger.warning(
+                    "Fetch posts failed", error=exc, attempt=attempt
+                )
+                if attempt >= max_retries:
+                    raise
+                if isinstance(exc, FloodWaitError):
+                    # Honor the server-supplied wait (bounded) instead of
+                    # our own backoff; retrying sooner only extends the ban.
+                    await asyncio.sleep(
+                        min(max(exc.seconds, 1), FLOOD_WAIT_FETCH_CAP_SECONDS)
+                    )
+                else:
+                    await retry_sleep(retry_delay, attempt)
+
+        return saved
+
+    async def status(self) -> str:
+        if self.client is None:
+            return "disconnected"
+        try:
+            if not self.connected:
+                return "disconnected"
+            # Health probes call this every few seconds; a positive answer
+            # only changes on sign-out, so it is cached for a short TTL
+            # instead of asking Telegram on every hit.
+            if time.monotonic() < self._auth_cached_until:
+                return "connected"
+            authorized = await self.client.is_user_authorized()
+            if authorized:
+                self._auth_cached_until = (
+                    time.monotonic() + STATUS_AUTH_CACHE_TTL_SECONDS
+                )
+            return "connected" if authorized else "unauthorized"
+        except Exception:  # pragma: no cover
+            return "error"
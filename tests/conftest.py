@@ -6,7 +6,9 @@ import pytz
 from src.config import Config
 
 
-@pytest.fixture
+# Session-scoped: every test reads the config without mutating it, so one
+# instance (and one pair of pytz-localized datetimes) serves the whole run.
+@pytest.fixture(scope="session")
 def fake_config() -> Config:
     tz = pytz.UTC
     return Config(
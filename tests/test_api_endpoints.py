@@ -1,10 +1,24 @@
-import pytest
+import dataclasses
+
 from fastapi.testclient import TestClient
 
 from src.main import create_app
 
 
 class FakeDatabase:
+    def __init__(self, lock_available=True):
+        self.lock_available = lock_available
+        self.unlocked = []
+
+    async def connect(self):
+        return None
+
+    async def try_advisory_lock(self, key):
+        return self.lock_available
+
+    async def advisory_unlock(self, key):
+        self.unlocked.append(key)
+
     async def close(self):
         return None
 
@@ -20,13 +34,19 @@ class FakeBotClient:
 
 
 class FakeScheduler:
-    def __init__(self, repost_result=None):
+    def __init__(self, repost_result=None, ingest_result=None):
         self.repost_result = repost_result
+        self.ingest_result = ingest_result
+        self.ingested = []
         self.initialized = False
 
     async def initialize(self):
         self.initialized = True
 
+    async def ingest_update(self, payload):
+        self.ingested.append(payload)
+        return self.ingest_result
+
     async def health(self):
         return {"database": "connected", "unpublished_posts": 1, "last_repost": None}
 
@@ -34,7 +54,6 @@ class FakeScheduler:
         return self.repost_result
 
 
-@pytest.mark.asyncio
 async def test_health_endpoint(fake_config):
     scheduler = FakeScheduler()
     app = create_app(
@@ -53,7 +72,6 @@ async def test_health_endpoint(fake_config):
         assert data["database"] == "connected"
 
 
-@pytest.mark.asyncio
 async def test_trigger_repost_success(fake_config):
     scheduler = FakeScheduler(repost_result={"message_id": 10})
     app = create_app(
@@ -70,7 +88,42 @@ async def test_trigger_repost_success(fake_config):
         assert response.json()["status"] == "ok"
 
 
-@pytest.mark.asyncio
+async def test_webhook_requires_matching_secret(fake_config):
+    config = dataclasses.replace(fake_config, webhook_secret="s3cret")
+    scheduler = FakeScheduler(ingest_result={"message_id": 5})
+    app = create_app(
+        config=config,
+        database=FakeDatabase(),
+        user_client=FakeUserClient(),
+        bot_client=FakeBotClient(),
+        scheduler=scheduler,
+    )
+
+    with TestClient(app) as client:
+        response = client.post("/webhook/wrong", json={"update_id": 1})
+        assert response.status_code == 403
+
+        response = client.post("/webhook/s3cret", json={"update_id": 1})
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok", "message_id": 5}
+        assert scheduler.ingested == [{"update_id": 1}]
+
+
+async def test_trigger_repost_conflict_when_lock_held(fake_config):
+    scheduler = FakeScheduler(repost_result={"message_id": 10})
+    app = create_app(
+        config=fake_config,
+        database=FakeDatabase(lock_available=False),
+        user_client=FakeUserClient(),
+        bot_client=FakeBotClient(),
+        scheduler=scheduler,
+    )
+
+    with TestClient(app) as client:
+        response = client.post("/trigger_repost")
+        assert response.status_code == 429
+
+
 async def test_trigger_repost_no_posts(fake_config):
     scheduler = FakeScheduler(repost_result=None)
     app = create_app(
@@ -3,7 +3,9 @@ import datetime as dt
 import pytest
 import pytz
 
-from src.bot_client import BotClient
+from telegram.error import BadRequest
+
+from src.bot_client import BotClient, MessageMissingError
 
 
 class FakeChat:
@@ -46,6 +48,18 @@ class FakeBot:
             }
         )
 
+    async def copy_messages(
+        self, chat_id, from_chat_id, message_ids, protect_content=False
+    ):
+        self.calls.append(
+            {
+                "chat_id": chat_id,
+                "from_chat_id": from_chat_id,
+                "message_ids": list(message_ids),
+                "protect_content": protect_content,
+            }
+        )
+
     async def get_updates(self, offset=None, allowed_updates=None, timeout=None):
         self.offsets.append(offset)
         return self.updates
@@ -57,7 +71,6 @@ class FakeBot:
         return {"id": 1}
 
 
-@pytest.mark.asyncio
 async def test_copy_post_uses_bot(fake_config):
     fake_bot = FakeBot()
     client = BotClient(fake_config.telegram_bot_token, bot=fake_bot)
@@ -69,7 +82,31 @@ async def test_copy_post_uses_bot(fake_config):
     assert fake_bot.calls[0]["message_id"] == 10
 
 
-@pytest.mark.asyncio
+async def test_copy_post_translates_missing_message(fake_config):
+    class MissingBot(FakeBot):
+        async def copy_message(self, *args, **kwargs):
+            raise BadRequest("Message to copy not found")
+
+    client = BotClient(fake_config.telegram_bot_token, bot=MissingBot())
+
+    with pytest.raises(MessageMissingError):
+        await client.copy_post(
+            fake_config.target_channel_id, fake_config.source_channel, 10
+        )
+
+
+async def test_copy_posts_batches_in_one_call(fake_config):
+    fake_bot = FakeBot()
+    client = BotClient(fake_config.telegram_bot_token, bot=fake_bot)
+
+    await client.copy_posts(
+        fake_config.target_channel_id, fake_config.source_channel, [10, 11, 12]
+    )
+
+    assert len(fake_bot.calls) == 1
+    assert fake_bot.calls[0]["message_ids"] == [10, 11, 12]
+
+
 async def test_close_bot(fake_config):
     fake_bot = FakeBot()
     client = BotClient(fake_config.telegram_bot_token, bot=fake_bot)
@@ -79,7 +116,6 @@ async def test_close_bot(fake_config):
     assert fake_bot.closed is True
 
 
-@pytest.mark.asyncio
 async def test_status_connected(fake_config):
     fake_bot = FakeBot()
     client = BotClient(fake_config.telegram_bot_token, bot=fake_bot)
@@ -89,7 +125,69 @@ async def test_status_connected(fake_config):
     assert status == "connected"
 
 
-@pytest.mark.asyncio
+def _webhook_payload(message_id, date, username, text):
+    return {
+        "update_id": 100,
+        "channel_post": {
+            "message_id": message_id,
+            "date": int(date.timestamp()),
+            "chat": {
+                "id": -1001,
+                "type": "channel",
+                "title": "Source",
+                "username": username,
+            },
+            "text": text,
+        },
+    }
+
+
+def test_extract_channel_post_accepts_matching_payload(fake_config):
+    client = BotClient(fake_config.telegram_bot_token, bot=FakeBot())
+    payload = _webhook_payload(
+        7,
+        pytz.UTC.localize(dt.datetime(2022, 10, 30, 12, 0)),
+        "source_channel",
+        "hello webhook",
+    )
+
+    post = client.extract_channel_post(
+        payload,
+        fake_config.source_channel,
+        fake_config.start_datetime,
+        fake_config.end_datetime,
+        fake_config.timezone,
+    )
+
+    assert post == {
+        "message_id": 7,
+        "channel_id": -1001,
+        "post_date": dt.datetime(2022, 10, 30, 12, 0),
+        "content_preview": "hello webhook",
+    }
+
+
+def test_extract_channel_post_filters_and_survives_garbage(fake_config):
+    client = BotClient(fake_config.telegram_bot_token, bot=FakeBot())
+    args = (
+        fake_config.source_channel,
+        fake_config.start_datetime,
+        fake_config.end_datetime,
+        fake_config.timezone,
+    )
+    in_window = pytz.UTC.localize(dt.datetime(2022, 10, 30, 12, 0))
+    past_window = pytz.UTC.localize(dt.datetime(2023, 5, 1, 12, 0))
+
+    wrong_source = _webhook_payload(8, in_window, "other_channel", "skip")
+    assert client.extract_channel_post(wrong_source, *args) is None
+
+    out_of_window = _webhook_payload(9, past_window, "source_channel", "late")
+    assert client.extract_channel_post(out_of_window, *args) is None
+
+    malformed = {"update_id": 100, "channel_post": {"date": "not-a-date"}}
+    assert client.extract_channel_post(malformed, *args) is None
+
+
 async def test_fetch_channel_posts_filters_and_tracks_update(fake_config):
     tz = pytz.UTC
     source_chat = FakeChat(chat_id=-1001, username="source_channel")
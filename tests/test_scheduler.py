@@ -1,10 +1,13 @@
 import datetime as dt
 
 import pytest
-from telegram.error import TelegramError
 
+from src.bot_client import MessageMissingError
 from src.scheduler import Scheduler
 
+# Shared stand-in for "some message object exists" answers.
+_SENTINEL = object()
+
 
 class FakeDB:
     def __init__(self, post=None, initial_posts=0):
@@ -59,7 +62,7 @@ class FakeUserClient:
         return self.fetch_saved
 
     async def get_messages(self, channel, ids):
-        return object() if self.message_exists else None
+        return _SENTINEL if self.message_exists else None
 
     async def status(self):
         return "connected"
@@ -69,9 +72,17 @@ class FakeUserClient:
 
 
 class FakeBotClient:
-    def __init__(self, copy_error=None):
+    def __init__(self, copy_error=None, updates=None):
         self.copied = []
         self.copy_error = copy_error
+        self.updates = updates or ([], None)
+        self.poll_offsets = []
+
+    async def fetch_channel_posts(
+        self, source_channel, start_date, end_date, timezone, last_update_id=None
+    ):
+        self.poll_offsets.append(last_update_id)
+        return self.updates
 
     async def copy_post(self, target_channel_id, source_channel, message_id):
         if self.copy_error:
@@ -85,47 +96,40 @@ class FakeBotClient:
         return "connected"
 
 
-@pytest.mark.asyncio
-async def test_repost_skips_when_no_posts(fake_config):
-    scheduler = Scheduler(
-        fake_config, FakeDB(post=None), FakeUserClient(), FakeBotClient()
-    )
-    result = await scheduler.repost_once()
-    assert result is None
-
-
-@pytest.mark.asyncio
-async def test_repost_copies_and_marks(fake_config):
-    post = {"message_id": 10, "channel_id": 20, "post_date": None}
-    db = FakeDB(post=post)
-    bot = FakeBotClient()
-    scheduler = Scheduler(fake_config, db, FakeUserClient(), bot)
-
-    result = await scheduler.repost_once()
-
-    assert result["message_id"] == 10
-    assert db.marked == [10]
-    assert bot.copied == [10]
-
-
-@pytest.mark.asyncio
-async def test_repost_marks_missing_message(fake_config):
-    post = {"message_id": 11, "channel_id": 20, "post_date": None}
+@pytest.mark.parametrize(
+    "post,message_exists,copy_error,expected_marked,expected_copied",
+    [
+        (None, True, None, [], []),
+        ({"message_id": 10, "channel_id": 20, "post_date": None}, True, None, [10], [10]),
+        (
+            {"message_id": 11, "channel_id": 20, "post_date": None},
+            False,
+            MessageMissingError("message to copy not found"),
+            [11],
+            [],
+        ),
+    ],
+    ids=["no-posts", "copies-and-marks", "marks-missing-message"],
+)
+async def test_repost_once(
+    fake_config, post, message_exists, copy_error, expected_marked, expected_copied
+):
     db = FakeDB(post=post)
+    bot = FakeBotClient(copy_error=copy_error)
     scheduler = Scheduler(
-        fake_config,
-        db,
-        FakeUserClient(message_exists=False),
-        FakeBotClient(copy_error=TelegramError("message to copy not found")),
+        fake_config, db, FakeUserClient(message_exists=message_exists), bot
     )
 
     result = await scheduler.repost_once()
 
-    assert result["message_id"] == 11
-    assert db.marked == [11]
+    if post is None:
+        assert result is None
+    else:
+        assert result["message_id"] == post["message_id"]
+    assert db.marked == expected_marked
+    assert bot.copied == expected_copied
 
 
-@pytest.mark.asyncio
 async def test_initialize_fetches_when_empty(fake_config):
     db = FakeDB(initial_posts=0)
     user = FakeUserClient(fetch_saved=2)
@@ -137,7 +141,26 @@ async def test_initialize_fetches_when_empty(fake_config):
     assert user.started is True
 
 
-@pytest.mark.asyncio
+async def test_poll_updates_persists_offset(fake_config):
+    post = {
+        "message_id": 3,
+        "channel_id": 20,
+        "post_date": dt.datetime(2022, 10, 30),
+        "content_preview": "text",
+    }
+    db = FakeDB()
+    db.config["bot_last_update_id"] = "4"
+    bot = FakeBotClient(updates=([post], 7))
+    scheduler = Scheduler(fake_config, db, FakeUserClient(), bot)
+
+    saved = await scheduler.poll_updates()
+
+    assert saved == 1
+    assert bot.poll_offsets == [4]
+    assert db.metadata == [3]
+    assert db.config["bot_last_update_id"] == "7"
+
+
 async def test_health_returns_iso_last_repost(fake_config):
     class HealthDB(FakeDB):
         async def count_unreposted(self):
@@ -150,7 +173,28 @@ async def test_health_returns_iso_last_repost(fake_config):
 
     health = await scheduler.health()
 
-    assert health["database"] == "connected"
-    assert health["last_repost"] == "2024-01-01T00:00:00"
-    assert health["telegram_user_api"] == "connected"
-    assert health["telegram_bot_api"] == "connected"
+    assert health == {
+        "database": "connected",
+        "telegram_user_api": "connected",
+        "telegram_bot_api": "connected",
+        "unpublished_posts": 2,
+        "last_repost": "2024-01-01T00:00:00",
+    }
+
+
+async def test_health_is_cached_within_ttl(fake_config):
+    class CountingDB(FakeDB):
+        probes = 0
+
+        async def latest_repost_time(self):
+            self.probes += 1
+            return None
+
+    db = CountingDB()
+    scheduler = Scheduler(fake_config, db, FakeUserClient(), FakeBotClient())
+
+    first = await scheduler.health()
+    second = await scheduler.health()
+
+    assert first == second
+    assert db.probes == 1
@@ -1,7 +1,6 @@
 import datetime as dt
 
 import pytest
-import pytz
 
 from src.user_client import UserClient
 
@@ -21,6 +20,9 @@ class StubDatabase:
     async def save_session_bytes(self, data: bytes):
         self.sessions.append(data)
 
+    async def max_message_id(self):
+        return 0
+
     async def upsert_post_metadata(
         self, message_id, channel_id, post_date, content_preview=None
     ):
@@ -33,6 +35,12 @@ class StubDatabase:
             }
         )
 
+    async def upsert_posts_bulk(self, rows):
+        for message_id, channel_id, post_date, content_preview in rows:
+            await self.upsert_post_metadata(
+                message_id, channel_id, post_date, content_preview
+            )
+
 
 class FakeSession:
     def save(self):
@@ -46,6 +54,42 @@ class FakeMessage:
         self.message = text
 
 
+# Built once at import: the messages are immutable and the client only
+# reads them, so each test run reuses the same objects. Stdlib
+# timezone.utc keeps pytz (and its localize machinery) out of this file.
+_UTC = dt.timezone.utc
+_MESSAGES = [
+    FakeMessage(1, dt.datetime(2022, 10, 30, 12, 0, tzinfo=_UTC), "hello"),
+    FakeMessage(2, dt.datetime(2022, 10, 31, 12, 0, tzinfo=_UTC), "world"),
+]
+
+
+class _FakeChannel:
+    def __init__(self, channel_id: int, username: str):
+        self.id = channel_id
+        self.username = username
+
+
+class _AsyncIter:
+    """Async view over a plain iterable, without generator machinery.
+
+    Telethon's iter_messages is itself a sync call returning an async
+    iterator, so this also mirrors the real client's shape.
+    """
+
+    def __init__(self, iterable):
+        self._it = iter(iterable)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
 class FakeTelethonClient:
     def __init__(self, messages):
         self.messages = messages
@@ -70,11 +114,14 @@ class FakeTelethonClient:
         self.authorized = True
 
     async def get_entity(self, channel):
-        return type("Channel", (), {"id": 99, "username": channel})()
+        return _FakeChannel(99, channel)
 
-    async def iter_messages(self, channel, offset_date=None, reverse=True):
-        for message in self.messages:
-            yield message
+    def iter_messages(
+        self, channel, offset_date=None, reverse=True, min_id=0, wait_time=None
+    ):
+        return _AsyncIter(
+            message for message in self.messages if message.id > min_id
+        )
 
     async def get_messages(self, channel, ids):
         for message in self.messages:
@@ -83,34 +130,67 @@ class FakeTelethonClient:
         return None
 
 
-@pytest.mark.asyncio
 async def test_fetch_posts_saves_metadata(fake_config):
-    tz = pytz.UTC
-    messages = [
-        FakeMessage(1, tz.localize(dt.datetime(2022, 10, 30, 12, 0)), "hello"),
-        FakeMessage(2, tz.localize(dt.datetime(2022, 10, 31, 12, 0)), "world"),
-    ]
-
     db = StubDatabase()
-    client = FakeTelethonClient(messages)
+    client = FakeTelethonClient(_MESSAGES)
     user_client = UserClient(fake_config, db, client=client)
 
-    saved = await user_client.fetch_posts(
-        fake_config.start_datetime, fake_config.end_datetime
-    )
+    start, end = fake_config.start_datetime, fake_config.end_datetime
+    saved = await user_client.fetch_posts(start, end)
 
     assert saved == 2
     assert len(db.metadata) == 2
     assert db.sessions[-1] == b"session-string"
 
 
-@pytest.mark.asyncio
+async def test_fetch_posts_surfaces_db_failure(fake_config):
+    # Regression test: a failing bulk upsert once deadlocked the pipeline
+    # (the producer's sentinel put blocked on a full queue nobody drained);
+    # it must instead surface after the retries are exhausted.
+    class FailingDatabase(StubDatabase):
+        async def upsert_posts_bulk(self, rows):
+            raise RuntimeError("bulk upsert failed")
+
+    date = dt.datetime(2022, 10, 30, 12, 0, tzinfo=_UTC)
+    messages = [FakeMessage(i, date, "text") for i in range(1, 1202)]
+    db = FailingDatabase()
+    client = FakeTelethonClient(messages)
+    user_client = UserClient(fake_config, db, client=client)
+
+    with pytest.raises(Exception):
+        await user_client.fetch_posts(
+            fake_config.start_datetime, fake_config.end_datetime
+        )
+
+
 async def test_user_status(fake_config):
     db = StubDatabase()
     client = FakeTelethonClient([])
     user_client = UserClient(fake_config, db, client=client)
+    # Pre-mark the client connected: this test asserts on status() only,
+    # and the full start() flow is covered by the auth-cache test below.
+    user_client.connected = True
 
-    await user_client.start()
     status = await user_client.status()
 
     assert status == "connected"
+
+
+async def test_status_caches_authorization_check(fake_config):
+    class CountingClient(FakeTelethonClient):
+        auth_checks = 0
+
+        async def is_user_authorized(self):
+            self.auth_checks += 1
+            return True
+
+    db = StubDatabase()
+    client = CountingClient([])
+    user_client = UserClient(fake_config, db, client=client)
+
+    await user_client.start()
+    checks_after_start = client.auth_checks
+    assert await user_client.status() == "connected"
+    assert await user_client.status() == "connected"
+
+    assert client.auth_checks == checks_after_start + 1